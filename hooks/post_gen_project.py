@@ -1,22 +1,32 @@
 """Hooks for setting up project once generated."""
 
+import atexit
+import functools
 import logging
+import re
 import shutil
 import subprocess
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
-from shutil import rmtree
 from typing import Any, Literal
 
-logger = logging.Logger("post_gen_project_logger")
+logger = logging.getLogger("post_gen_project")
 logger.setLevel(logging.INFO)
 
 
 PROTOCOL = Literal["git", "https"]
 GITHUB_PRIVACY_OPTIONS = ["private", "internal", "public"]
 MINIMUM_PYTHON_MINOR_VERSION = 12
+_CURRENT_YEAR = datetime.now().year
+# Dependency placeholders fill an entire line, so the indentation and newline are also replaced
+_PLACEHOLDER_RE = re.compile(
+    r"^ {4}\{(dependencies|dev_dependencies)\}\n|\{(python_version|year|author_name)\}",
+    re.MULTILINE,
+)
 
 
 class CodingAgent(str, Enum):
@@ -37,11 +47,62 @@ def call(cmd: str, check: bool = True, **kwargs: Any) -> subprocess.CompletedPro
         strings with spaces are not yet supported
     """
     logger.debug(f"Calling: {cmd}")
-    return subprocess.run(cmd.split(), check=check, **kwargs)
+    program, *args = cmd.split()
+    # An absolute path without close_fds lets subprocess use the faster posix_spawn
+    kwargs.setdefault("close_fds", False)
+    return subprocess.run([_which(program) or program, *args], check=check, **kwargs)
 
 
-def set_python_version() -> None:
-    """Set the python version in pyproject.toml and .github/workflows/test.yml."""
+@functools.cache
+def _which(program: str) -> str | None:
+    """Find (and cache) the absolute path to a program.
+
+    Args:
+        program: name of the program
+    Returns:
+        absolute path to the program, or None if it is not found
+    """
+    return shutil.which(program)
+
+
+def _fill_placeholders(contents: str, mapping: dict[str, str]) -> tuple[str, int]:
+    """Replace the placeholders in a string with a single pass.
+
+    Args:
+        contents: string containing placeholders
+        mapping: placeholder names (without braces) and their replacements;
+            placeholders not in mapping are left untouched
+
+    Returns:
+        filled contents and number of placeholders found
+    """
+    return _PLACEHOLDER_RE.subn(lambda m: mapping.get(m[1] or m[2], m[0]), contents)
+
+
+def _substitute(file_name: str | Path, mapping: dict[str, str]) -> None:
+    """Replace the placeholders in a file with a single pass.
+
+    Args:
+        file_name: name of the file to update
+        mapping: placeholder names (without braces) and their replacements;
+            placeholders not in mapping are left untouched
+    """
+    # Read and write through a single file descriptor
+    with Path(file_name).open("r+") as f:
+        contents, count = _fill_placeholders(f.read(), mapping)
+        # Avoid rewriting files without placeholders
+        if count:
+            f.seek(0)
+            f.write(contents)
+            f.truncate()
+
+
+def set_python_version() -> str:
+    """Set the python version in .github/workflows/test.yml.
+
+    Returns:
+        python version (e.g. "3.13") for pyproject.toml
+    """
     python_version = f"{sys.version_info.major}.{sys.version_info.minor}"
     logger.info(f"Settting {python_version=}")
     if sys.version_info.minor < MINIMUM_PYTHON_MINOR_VERSION:
@@ -49,20 +110,12 @@ def set_python_version() -> None:
             f"{python_version=} should be upgraded to the latest avaiable python version."
         )
 
-    file_names = [
-        ".github/workflows/test.yml",
-        "pyproject.toml",
-    ]
-
-    for file_name in file_names:
-        with open(file_name) as f:
-            contents = f.read().replace("{python_version}", python_version)
-        with open(file_name, "w") as f:
-            f.write(contents)
+    _substitute(".github/workflows/test.yml", {"python_version": python_version})
+    return python_version
 
 
 def set_license(license: str | None = "MIT") -> None:
-    """Copy the license file to LICENSE (if any).
+    """Write the license file to LICENSE (if any).
 
     Args:
         license: name of the license (or None for no license)
@@ -71,29 +124,31 @@ def set_license(license: str | None = "MIT") -> None:
         logger.debug("No license set")
         return
 
-    licenses = {lic.name for lic in Path("data/licenses").iterdir()}
-    if license not in licenses:
+    source = Path(f"data/licenses/{license}")
+    # Only scan the available licenses if there is no exact match
+    if not source.is_file():
+        licenses = {lic.name for lic in source.parent.iterdir()}
         try:
             # Check and correct cases
             license = next(lic for lic in licenses if lic.lower() == license.lower())
             logger.warning(f"Corrected license to {license=}")
         except StopIteration as e:
             raise ValueError(f"{license=} not available; select from:\n{licenses}") from e
+        source = source.with_name(license)
 
-    shutil.copy(f"data/licenses/{license}", "LICENSE")
-
-    with open("LICENSE") as f:
-        contents = f.read().replace("{year}", f"{datetime.now().year}")
-        contents = contents.replace("{author_name}", "{{cookiecutter.author_name}}")
-    with open("LICENSE", "w") as f:
-        f.write(contents)
+    # Fill in the placeholders before writing rather than copying and rewriting
+    contents, _ = _fill_placeholders(
+        source.read_text(),
+        {"year": f"{_CURRENT_YEAR}", "author_name": "{{cookiecutter.author_name}}"},
+    )
+    Path("LICENSE").write_text(contents)
 
     logger.debug(f"Set {license=}")
 
 
 def git_init() -> None:
     """Initialize a git repository."""
-    call("git init")
+    call("git init -q")
 
 
 def process_dependencies(deps: str) -> str:
@@ -112,47 +167,58 @@ def process_dependencies(deps: str) -> str:
     if not deps.strip():
         return ""
 
-    return "".join(f'    "{dep}",\n' for dep in deps.split())
+    # str.join materializes its input, so a list avoids the generator overhead
+    return "".join([f'    "{dep}",\n' for dep in deps.split()])
 
 
-def update_dependencies() -> None:
-    """Add and update the dependencies in pyproject.toml and uv.lock."""
+def get_dependencies() -> dict[str, str]:
+    """Get the processed dependencies and dev dependencies for pyproject.toml."""
     # Extra space and .strip() avoids accidentally creating '""""'
-    dependencies = process_dependencies("""{{cookiecutter.dependencies}} """.strip())
-    dev_dependencies = process_dependencies("""{{cookiecutter.dev_dependencies}} """.strip())
-
-    with open("pyproject.toml") as f:
-        contents = (
-            f.read()
-            .replace("    {dependencies}\n", dependencies)
-            .replace("    {dev_dependencies}\n", dev_dependencies)
-        )
-    with open("pyproject.toml", "w") as f:
-        f.write(contents)
+    return {
+        "dependencies": process_dependencies("""{{cookiecutter.dependencies}} """.strip()),
+        "dev_dependencies": process_dependencies("""{{cookiecutter.dev_dependencies}} """.strip()),
+    }
+
+
+def _rewrite_pyproject(mapping: dict[str, str]) -> None:
+    """Fill in the pyproject.toml placeholders with a single read and write.
+
+    Args:
+        mapping: placeholder names (without braces) and their replacements
+    """
+    _substitute("pyproject.toml", mapping)
+
+
+def update_dependencies(dependencies: dict[str, str]) -> None:
+    """Update uv.lock and install the dependencies (if any were added).
+
+    Without added dependencies, the sync is left to `uv run` when installing the git hooks.
+
+    Args:
+        dependencies: processed dependencies (see get_dependencies)
+    """
+    if not any(dependencies.values()):
+        logger.debug("No dependencies added; skipping uv sync")
+        return
 
     call("uv sync")
 
 
-def check_program(program: str, install_str: str, **run_kwargs: Any) -> None:
-    """Check that a program is installed.
+def check_program(program: str, install_str: str) -> None:
+    """Check that a program is installed (without running it).
 
     Args:
         program: name of the program to check
         install_str: string to print if the program is not installed
-        run_kwargs: keyword arguments to pass to subprocess.call
     Examples:
         >>> check_program("python", "https://www.python.org")  # doctest: +SKIP
-        >>> check_program("this_program_does_not_exist", "nothing")  # doctest: +SKIP
+        >>> check_program("this_program_does_not_exist", "nothing")
         Traceback (most recent call last):
         ...
         OSError: this_program_does_not_exist is not installed; install with `nothing`
     """
-    try:
-        call(program, stdout=subprocess.DEVNULL, **run_kwargs)
-    except FileNotFoundError as e:
-        raise OSError(f"{program} is not installed; install with `{install_str}`") from e
-    except subprocess.CalledProcessError as e:
-        raise OSError(f"Issue with {program} encountered") from e
+    if _which(program) is None:
+        raise OSError(f"{program} is not installed; install with `{install_str}`")
 
 
 def allow_direnv() -> None:
@@ -166,21 +232,36 @@ def git_hooks() -> None:
     call("uv run prek install")
 
 
-def setup_coding_agent_files(agent: str) -> None:
-    """Set up coding agent files.
+def _resolve_agent(agent: str) -> CodingAgent | None:
+    """Resolve the coding agent from its name.
 
     Args:
-        agent: coding agent name ("claude", "codex", or "none")
+        agent: coding agent name ("claude", "codex", or "none"; case insensitive)
+
+    Returns:
+        coding agent, or None if no agent was selected
+    Examples:
+        >>> _resolve_agent("Claude")
+        <CodingAgent.CLAUDE: 'claude'>
+        >>> _resolve_agent("None")
     """
     if agent.lower() == "none":
-        return
+        return None
+    return CodingAgent(agent.lower())
+
+
+def setup_coding_agent_files(coding_agent: CodingAgent) -> None:
+    """Set up coding agent files.
 
-    coding_agent = CodingAgent(agent.lower())
+    Args:
+        coding_agent: coding agent to set up
+    """
     logger.info(f"Setting up files for {coding_agent}.")
 
-    # Copy agent README to appropriate filename
+    # Move (rather than copy) files out of data/ as it is removed afterwards;
+    # shutil.move renames on the same filesystem and only copies across devices
     source = Path("data/AGENTS_README.md")
-    shutil.copytree("data/.claude", ".claude")
+    shutil.move("data/.claude", ".claude")
 
     match coding_agent:
         case CodingAgent.CLAUDE:
@@ -192,20 +273,44 @@ def setup_coding_agent_files(agent: str) -> None:
         case _:
             raise ValueError(f"Unsupported coding agent: {coding_agent}")
 
-    shutil.copy(source, destination)
-    logger.info(f"Copied {source} to {destination}")
+    shutil.move(source, destination)
+    logger.info(f"Moved {source} to {destination}")
     logger.info(f"Run `{cmd}` to finish agent setup.")
 
 
 def remove_data_dir() -> None:
-    """Remove the data directory."""
-    rmtree("data")
+    """Remove the data directory.
+
+    The directory is moved out of the project immediately and deleted when the hook exits.
+    """
+    # Sibling of the project so that the rename stays on the same filesystem
+    trash = Path(tempfile.mkdtemp(prefix=".data-", dir=Path.cwd().parent))
+    Path("data").rename(trash / "data")
+    atexit.register(shutil.rmtree, trash, ignore_errors=True)
+
+
+def git_stage_all() -> subprocess.Popen[bytes]:
+    """Start staging all files in the background.
+
+    Returns:
+        running `git add .` process (see git_initial_commit)
+    """
+    logger.debug("Calling: git add .")
+    return subprocess.Popen([_which("git") or "git", "add", "."], close_fds=False)
+
 
+def git_initial_commit(staging: subprocess.Popen[bytes]) -> None:
+    """Make the initial commit once staging has finished.
+
+    Args:
+        staging: running `git add .` process (see git_stage_all)
 
-def git_initial_commit() -> None:
-    """Make the initial commit."""
-    call("git add .")
-    call("git commit -m Setup")
+    Raises:
+        CalledProcessError: if staging failed
+    """
+    if returncode := staging.wait():
+        raise subprocess.CalledProcessError(returncode, staging.args)
+    call("git commit -q -m Setup")
 
 
 def setup_remote(remote: str = "origin") -> None:
@@ -257,10 +362,15 @@ def github_setup(privacy: str, remote: str = "origin", default_branch: str = "ma
     except subprocess.CalledProcessError as e:
         logger.error(f"Error creating GitHub repository, likely already exists: {e}")
 
+    # Write both upstream entries at once rather than calling `git config` for each
     try:
-        call(f"git config branch.{default_branch}.remote {remote}")
-        call(f"git config branch.{default_branch}.merge refs/heads/{default_branch}")
-    except subprocess.CalledProcessError as e:
+        with Path(".git/config").open("a") as f:
+            f.write(
+                f'[branch "{default_branch}"]\n'
+                f"\tremote = {remote}\n"
+                f"\tmerge = refs/heads/{default_branch}\n"
+            )
+    except OSError as e:
         logger.error(f"Error setting upstream to {default_branch}: {e}")
 
 
@@ -282,18 +392,31 @@ TERMINATOR = "\x1b[0m"
 
 def main() -> None:
     """Run the post generation hooks."""
-    set_python_version()
-    set_license("{{cookiecutter.license}}")
+    # Independent steps (each touches different files) run concurrently
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        git_init_future = executor.submit(git_init)
+        license_future = executor.submit(set_license, "{{cookiecutter.license}}")
+        python_version_future = executor.submit(set_python_version)
+    git_init_future.result()
+    license_future.result()
+    python_version = python_version_future.result()
+
+    dependencies = get_dependencies()
+    _rewrite_pyproject({"python_version": python_version, **dependencies})
     if "{{cookiecutter.publish_on_pypi}}" == "True":  # noqa: PLR0133
         Path(".github/workflows/publish.yml").unlink()
-    git_init()
-    update_dependencies()
+    update_dependencies(dependencies)
     allow_direnv()
     git_hooks()
-    setup_coding_agent_files("{{cookiecutter.coding_agent}}")
+    if coding_agent := _resolve_agent("{{cookiecutter.coding_agent}}"):
+        setup_coding_agent_files(coding_agent)
     remove_data_dir()
-    git_initial_commit()
-    setup_remote("origin")
+    # Set up the remote while git indexes the files; the commit does not depend on it
+    staging = git_stage_all()
+    try:
+        setup_remote("origin")
+    finally:
+        git_initial_commit(staging)
 
     notes()
 
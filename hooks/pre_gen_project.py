@@ -1,7 +1,9 @@
 """Hooks to run before generating the project."""
 
 import keyword
-from re import match
+import re
+
+MODULE_REGEX = re.compile(r"^[a-zA-Z][_a-zA-Z0-9]+$")
 
 
 def main() -> None:
@@ -35,11 +37,10 @@ def check_module_name(module_name: str) -> None:
     if not module_name:
         raise ValueError("Module name cannot be empty.")
 
-    if module_name in keyword.kwlist:
+    if keyword.iskeyword(module_name):
         raise ValueError(f"{module_name=} is a Python keyword and cannot be used as a module name.")
 
-    MODULE_REGEX = r"^[a-zA-Z][_a-zA-Z0-9]+$"
-    if not match(MODULE_REGEX, module_name):
+    if not MODULE_REGEX.match(module_name):
         raise ValueError(f"{module_name=} is not a valid Python module name.")
 
 
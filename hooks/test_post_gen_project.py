@@ -1,5 +1,9 @@
 """Tests for post_gen_project hook behavior."""
 
+import shutil
+import subprocess
+import sys
+from contextlib import AbstractContextManager, nullcontext
 from pathlib import Path
 from types import SimpleNamespace
 
@@ -8,8 +12,10 @@ import pytest
 from hooks import post_gen_project
 
 
-def test_set_python_version_updates_files(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
-    """Replace {python_version} in target files."""
+def test_set_python_version_updates_workflow(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Replace {python_version} in the test workflow."""
     workflow_path = tmp_path / ".github" / "workflows"
     workflow_path.mkdir(parents=True)
 
@@ -23,21 +29,20 @@ def test_set_python_version_updates_files(tmp_path: Path, monkeypatch: pytest.Mo
     args = SimpleNamespace(version_info=SimpleNamespace(major=3, minor=13))
     monkeypatch.setattr(post_gen_project, "sys", args)
 
-    post_gen_project.set_python_version()
+    assert post_gen_project.set_python_version() == "3.13"
 
     workflow_contents = (workflow_path / "test.yml").read_text(encoding="utf-8")
     pyproject_contents = (tmp_path / "pyproject.toml").read_text(encoding="utf-8")
 
     assert workflow_contents == "python: 3.13\n"
-    assert pyproject_contents == 'requires-python = ">= 3.13"\n'
-    assert "{python_version}" not in workflow_contents
-    assert "{python_version}" not in pyproject_contents
+    # pyproject.toml is filled in later along with the dependencies
+    assert pyproject_contents == 'requires-python = ">= {python_version}"\n'
 
 
 def test_set_python_version_warns_on_old_minor(
     tmp_path: Path,
     monkeypatch: pytest.MonkeyPatch,
-    capsys: pytest.CaptureFixture[str],
+    caplog: pytest.LogCaptureFixture,
 ) -> None:
     """Warn when Python minor version is below supported minimum."""
     workflow_path = tmp_path / ".github" / "workflows"
@@ -53,8 +58,7 @@ def test_set_python_version_warns_on_old_minor(
     monkeypatch.setattr(post_gen_project, "sys", args)
 
     post_gen_project.set_python_version()
-    captured = capsys.readouterr()
-    assert "should be upgraded" in captured.err
+    assert "should be upgraded" in caplog.text
 
 
 def test_set_license_copies_and_formats(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
@@ -67,16 +71,172 @@ def test_set_license_copies_and_formats(tmp_path: Path, monkeypatch: pytest.Monk
     )
 
     monkeypatch.chdir(tmp_path)
-    args = SimpleNamespace(now=lambda: SimpleNamespace(year=2026))
-    monkeypatch.setattr(post_gen_project, "datetime", args)
-
     post_gen_project.set_license("MIT")
 
     license_contents = (tmp_path / "LICENSE").read_text(encoding="utf-8")
-    assert "2026" in license_contents
+    assert f"{post_gen_project._CURRENT_YEAR}" in license_contents
     assert "{{cookiecutter.author_name}}" in license_contents
 
 
+@pytest.mark.parametrize("license", ["mit", "MIT"])
+def test_set_license_corrects_case(
+    license: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Find the license regardless of case."""
+    licenses_path = tmp_path / "data" / "licenses"
+    licenses_path.mkdir(parents=True)
+    (licenses_path / "MIT").write_text("MIT License", encoding="utf-8")
+    (licenses_path / "APL-2.0").write_text("Apache License", encoding="utf-8")
+
+    monkeypatch.chdir(tmp_path)
+    post_gen_project.set_license(license)
+
+    assert (tmp_path / "LICENSE").read_text(encoding="utf-8") == "MIT License"
+
+
+def test_set_license_unavailable(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Raise if the license is not available."""
+    (tmp_path / "data" / "licenses").mkdir(parents=True)
+
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(ValueError, match="not available"):
+        post_gen_project.set_license("GPL-3.0")
+
+
+@pytest.mark.parametrize(
+    ("dependencies", "expected"),
+    [
+        ({"dependencies": "", "dev_dependencies": ""}, []),
+        ({"dependencies": '    "numpy",\n', "dev_dependencies": ""}, ["uv sync"]),
+        ({"dependencies": "", "dev_dependencies": '    "pytest-xdist",\n'}, ["uv sync"]),
+    ],
+)
+def test_update_dependencies_syncs_when_needed(
+    dependencies: dict[str, str],
+    expected: list[str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Only run uv sync when dependencies were added."""
+    calls: list[str] = []
+
+    def fake_call(cmd: str, **_: object) -> None:
+        calls.append(cmd)
+
+    monkeypatch.setattr(post_gen_project, "call", fake_call)
+    post_gen_project.update_dependencies(dependencies)
+    assert calls == expected
+
+
+def test_call_resolves_program(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Call programs by their absolute path."""
+    runs: list[list[str]] = []
+
+    def fake_run(args: list[str], **kwargs: object) -> None:
+        runs.append(args)
+        assert kwargs == {"check": True, "close_fds": False}
+
+    monkeypatch.setattr(post_gen_project.subprocess, "run", fake_run)
+    monkeypatch.setattr(post_gen_project, "_which", {"git": "/usr/bin/git"}.get)
+    post_gen_project.call("git init")
+    post_gen_project.call("missing --flag")
+
+    assert runs == [["/usr/bin/git", "init"], ["missing", "--flag"]]
+
+
+@pytest.mark.parametrize(
+    ("dependencies", "expected"),
+    [
+        ('    "{year}",\n', 'dependencies = [\n    "{year}",\n]\n2026 {author_name}\n'),
+        ("", "dependencies = [\n]\n2026 {author_name}\n"),
+    ],
+)
+def test_substitute_single_pass(tmp_path: Path, dependencies: str, expected: str) -> None:
+    """Replace placeholders at once, leaving replacements and unmapped placeholders alone."""
+    path = tmp_path / "pyproject.toml"
+    path.write_text(
+        "dependencies = [\n    {dependencies}\n]\n{year} {author_name}\n", encoding="utf-8"
+    )
+
+    post_gen_project._substitute(path, {"dependencies": dependencies, "year": "2026"})
+
+    assert path.read_text(encoding="utf-8") == expected
+
+
+@pytest.mark.parametrize(
+    ("agent", "destination"),
+    [
+        (post_gen_project.CodingAgent.CLAUDE, "CLAUDE.md"),
+        (post_gen_project.CodingAgent.CODEX, "AGENTS.md"),
+    ],
+)
+def test_setup_coding_agent_files_moves_data(
+    agent: post_gen_project.CodingAgent,
+    destination: str,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Move agent files out of the data directory."""
+    skills_path = tmp_path / "data" / ".claude" / "skills"
+    skills_path.mkdir(parents=True)
+    (skills_path / "SKILL.md").write_text("skill", encoding="utf-8")
+    (tmp_path / "data" / "AGENTS_README.md").write_text("readme", encoding="utf-8")
+
+    monkeypatch.chdir(tmp_path)
+    post_gen_project.setup_coding_agent_files(agent)
+
+    assert (tmp_path / destination).read_text(encoding="utf-8") == "readme"
+    assert (tmp_path / ".claude" / "skills" / "SKILL.md").read_text(encoding="utf-8") == "skill"
+    assert not any((tmp_path / "data").iterdir())
+
+
+@pytest.mark.parametrize(
+    ("returncode", "context", "expected"),
+    [
+        (0, nullcontext(), ["git commit -q -m Setup"]),
+        (1, pytest.raises(subprocess.CalledProcessError), []),
+    ],
+)
+def test_git_initial_commit_waits_for_staging(
+    returncode: int,
+    context: AbstractContextManager[object],
+    expected: list[str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Only commit once staging has succeeded."""
+    calls: list[str] = []
+
+    def fake_call(cmd: str, **_: object) -> None:
+        calls.append(cmd)
+
+    monkeypatch.setattr(post_gen_project, "call", fake_call)
+    staging = subprocess.Popen([sys.executable, "-c", f"raise SystemExit({returncode})"])
+    with context:
+        post_gen_project.git_initial_commit(staging)
+    assert calls == expected
+
+
+def test_remove_data_dir_defers_deletion(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Move the data directory out of the project and delete it on exit."""
+    project_path = tmp_path / "project"
+    (project_path / "data" / "licenses").mkdir(parents=True)
+    (project_path / "data" / "licenses" / "MIT").write_text("MIT License", encoding="utf-8")
+    registered: list[tuple[object, Path]] = []
+
+    def fake_register(func: object, trash: Path, **_: object) -> None:
+        registered.append((func, trash))
+
+    monkeypatch.chdir(project_path)
+    monkeypatch.setattr(post_gen_project.atexit, "register", fake_register)
+    post_gen_project.remove_data_dir()
+
+    assert not (project_path / "data").exists()
+    [(func, trash)] = registered
+    assert func is shutil.rmtree
+    assert (trash / "data" / "licenses" / "MIT").exists()
+    shutil.rmtree(trash)
+    assert list(tmp_path.iterdir()) == [project_path]
+
+
 @pytest.mark.parametrize(
     ("protocol", "expected"),
     [
@@ -98,3 +258,24 @@ def test_git_add_remote_formats_url(
     monkeypatch.setattr(post_gen_project, "call", fake_call)
     post_gen_project.git_add_remote("origin", "https://github.com/user/repo.git", protocol=protocol)
     assert calls == [f"git remote add origin {expected}"]
+
+
+def test_github_setup_sets_upstream(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Set the upstream of the default branch without calling git config."""
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".git" / "config").write_text("[core]\n\tbare = false\n", encoding="utf-8")
+    calls: list[str] = []
+
+    def fake_call(cmd: str, **_: object) -> None:
+        calls.append(cmd)
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(post_gen_project, "call", fake_call)
+    monkeypatch.setattr(post_gen_project, "check_program", lambda *_: None)
+    post_gen_project.github_setup("private", "upstream", "main")
+
+    assert len(calls) == 1
+    assert calls[0].startswith("gh repo create")
+    assert (tmp_path / ".git" / "config").read_text(encoding="utf-8") == (
+        '[core]\n\tbare = false\n[branch "main"]\n\tremote = upstream\n\tmerge = refs/heads/main\n'
+    )